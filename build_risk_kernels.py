@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time compile the RiskManager numeric kernels
+
+Builds modules/_risk_kernels (a native extension) from the numba kernels in
+modules/_risk_numba.py. When the extension is present the bot loads the precompiled
+code at import, so the first stop loss calculation doesn't wait on the JIT compiler.
+Without it the kernels are JIT compiled on first use as before.
+
+Run again after changing modules/_risk_numba.py:
+    python build_risk_kernels.py
+"""
+import sys
+import os
+import logging
+
+# Make sure the kernels are compiled from source, not from a previous build
+sys.modules['modules._risk_kernels'] = None
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from numba.pycc import CC
+
+from modules._risk_numba import (
+    _compute_stop_price, _nearest_levels, _round_step_size, _stop_prices, _swing_pivots, _weighted_atr
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('build_risk_kernels')
+
+cc = CC('_risk_kernels')
+cc.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
+
+
+# Exported functions need fixed signatures, so kernels with default arguments get thin wrappers
+
+@cc.export('weighted_atr', 'f8(f8[:], f8[:], f8[:])')
+def weighted_atr(high, low, close):
+    return _weighted_atr(high, low, close)
+
+
+@cc.export('swing_pivots', 'UniTuple(f8[:], 2)(f8[:], f8[:])')
+def swing_pivots(high, low):
+    return _swing_pivots(high, low)
+
+
+@cc.export('nearest_levels', 'UniTuple(f8, 2)(f8[:], f8[:], f8, b1)')
+def nearest_levels(swing_highs, swing_lows, entry_price, side_is_buy):
+    return _nearest_levels(swing_highs, swing_lows, entry_price, side_is_buy)
+
+
+@cc.export('compute_stop_price', 'Tuple((f8, f8, i8))(f8, f8, f8, f8, f8, f8)')
+def compute_stop_price(direction, entry_price, atr, atr_multiplier, nearest_level, max_stop_pct):
+    return _compute_stop_price(direction, entry_price, atr, atr_multiplier, nearest_level, max_stop_pct)
+
+
+# ATRs are float32 on the batch path (see calculate_volatility_based_stop_loss_batch)
+@cc.export('stop_prices', 'f8[:](f8[:], f8[:], f4[:], f8[:], f8[:], f8[:])')
+def stop_prices(directions, entry_prices, atrs, atr_multipliers, nearest_levels, max_stop_pcts):
+    return _stop_prices(directions, entry_prices, atrs, atr_multipliers, nearest_levels, max_stop_pcts)
+
+
+@cc.export('round_step_size', 'f8(f8, f8)')
+def round_step_size(quantity, step_size):
+    return _round_step_size(quantity, step_size)
+
+
+if __name__ == '__main__':
+    logger.info(f"Compiling risk kernels into {cc.output_dir}")
+    cc.compile()
+    logger.info("Risk kernels compiled")
@@ -201,6 +201,8 @@ def setup():
     # Initialize futures settings for the trading symbol
     try:
         binance_client.initialize_futures(TRADING_SYMBOL)
+        # Load symbol info and price precision before the first signal
+        risk_manager.load_symbol_info(TRADING_SYMBOL)
     except Exception as e:
         logger.error(f"Failed to initialize futures: {e}")
         exit(1)
@@ -1016,6 +1018,9 @@ def check_for_signals(symbol=None):
                         logger.info(f"Updated trailing take profit to {take_profit_price}")
                 else:
                     logger.error(f"Failed to update take profit order at {take_profit_price}")
+                    
+                # Orders were replaced, so the next trailing check must fetch them again
+                risk_manager.invalidate_open_orders(symbol)
     
     except Exception as e:
         logger.error(f"Error in trading cycle: {e}")
@@ -0,0 +1,201 @@
+"""
+Numba-compiled numeric kernels used by RiskManager
+
+The functions here only take and return plain floats and NumPy arrays so they can be
+compiled with numba.njit. If numba is not installed they run as regular Python.
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback when numba is not available: return the function unchanged"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True)
+def _wilder_atr(tr, window):
+    """
+    Latest value of Wilder's ATR over a true range array
+
+    Uses the same smoothing as ta.volatility.average_true_range: the first value is the
+    simple mean of the first `window` true ranges, then atr = (prev * (window - 1) + tr) / window.
+    """
+    if len(tr) < window:
+        raise ValueError("Not enough candles for ATR window")
+
+    atr = 0.0
+    for i in range(window):
+        atr += tr[i]
+    atr /= window
+    for i in range(window, len(tr)):
+        atr = (atr * (window - 1) + tr[i]) / window
+    return atr
+
+
+@njit(cache=True, fastmath=True)
+def _weighted_atr(high, low, close, w_short=7, w_medium=14, w_long=21):
+    """
+    ATR blended over three windows with weights 0.5/0.3/0.2 (more weight to recent volatility)
+
+    Args:
+        high, low, close: float64 arrays of candle prices, oldest first
+        w_short, w_medium, w_long: ATR windows
+    """
+    n = len(close)
+
+    # True range (first candle uses its own close as the previous close)
+    tr = np.empty(n)
+    prev_close = close[0]
+    for i in range(n):
+        tr[i] = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+        prev_close = close[i]
+
+    return (_wilder_atr(tr, w_short) * 0.5 +
+            _wilder_atr(tr, w_medium) * 0.3 +
+            _wilder_atr(tr, w_long) * 0.2)
+
+
+@njit(cache=True, fastmath=True)
+def _swing_pivots(high, low, lookback=50):
+    """
+    Swing highs and swing lows over the last `lookback` candles
+
+    A candle is a pivot when it is strictly above (or below) the two candles on either side of it.
+
+    Returns:
+        tuple: (swing high prices, swing low prices) as sorted float64 arrays
+    """
+    n = len(high)
+    start = max(n - lookback, 0)
+    swing_highs = np.empty(n)
+    swing_lows = np.empty(n)
+    n_highs = 0
+    n_lows = 0
+    for i in range(start + 2, n - 2):
+        h = high[i]
+        if h > high[i - 1] and h > high[i - 2] and h > high[i + 1] and h > high[i + 2]:
+            swing_highs[n_highs] = h
+            n_highs += 1
+        l = low[i]
+        if l < low[i - 1] and l < low[i - 2] and l < low[i + 1] and l < low[i + 2]:
+            swing_lows[n_lows] = l
+            n_lows += 1
+    # Sorted so the nearest level to a price can be found with a binary search
+    return np.sort(swing_highs[:n_highs]), np.sort(swing_lows[:n_lows])
+
+
+@njit(cache=True, fastmath=True)
+def _nearest_levels(swing_highs, swing_lows, entry_price, side_is_buy):
+    """
+    Nearest swing support below the entry (longs) or resistance above it (shorts)
+
+    Args:
+        swing_highs, swing_lows: Sorted pivot prices, as returned by _swing_pivots
+
+    Returns:
+        tuple: (nearest support, nearest resistance). Only the level for the given side is
+        searched; a missing level is returned as 0.0.
+    """
+    nearest_support = 0.0
+    nearest_resistance = 0.0
+    if side_is_buy:
+        # Last low strictly below the entry
+        idx = np.searchsorted(swing_lows, entry_price, side='left')
+        if idx > 0:
+            nearest_support = swing_lows[idx - 1]
+    else:
+        # First high strictly above the entry
+        idx = np.searchsorted(swing_highs, entry_price, side='right')
+        if idx < len(swing_highs):
+            nearest_resistance = swing_highs[idx]
+    return nearest_support, nearest_resistance
+
+
+@njit(cache=True, fastmath=True)
+def _compute_stop_price(direction, entry_price, atr, atr_multiplier, nearest_level, max_stop_pct):
+    """
+    ATR based stop price, moved to a nearby support/resistance and capped to a maximum distance
+
+    Longs and shorts are mirror images, so the short case is computed as a long on
+    sign-flipped prices (direction * price) and flipped back.
+
+    Args:
+        direction: 1.0 for longs (stop below the entry), -1.0 for shorts (stop above it)
+        entry_price: Entry price
+        atr: Average true range
+        atr_multiplier: ATR multiples between the entry and the stop
+        nearest_level: Nearest support (longs) or resistance (shorts), 0.0 if there is none
+        max_stop_pct: Maximum stop distance as a fraction of the entry price
+
+    Returns:
+        tuple: (stop price, stop price before the maximum distance cap,
+        1 if the support/resistance level was used else 0)
+    """
+    atr_stop_distance = atr * atr_multiplier
+    max_level_distance = atr_stop_distance * 1.5  # Levels further away than 1.5x the ATR distance are ignored
+    level_buffer = atr * 0.05  # The stop goes 5% of ATR beyond the level
+
+    # Sign-flipped prices, each computed once and shared by the max() calls below
+    signed_atr_stop = direction * entry_price - atr_stop_distance
+    signed_capped_price = direction * entry_price - entry_price * max_stop_pct
+
+    # Use the level when it's close enough, otherwise fall back to the ATR stop so the max always applies
+    used_level = 0
+    signed_level_stop = signed_atr_stop
+    if nearest_level != 0.0 and direction * (entry_price - nearest_level) <= max_level_distance:
+        signed_level_stop = direction * nearest_level - level_buffer
+        used_level = 1
+
+    # Tightest of the ATR stop, the level stop and the maximum distance cap in one max()
+    stop_price = direction * max(signed_atr_stop, signed_level_stop, signed_capped_price)
+    level_stop_price = stop_price
+    if used_level:
+        # Reported in the logs: the level based stop before the cap
+        level_stop_price = direction * max(signed_atr_stop, signed_level_stop)
+    return stop_price, level_stop_price, used_level
+
+
+@njit(cache=True, fastmath=True)
+def _stop_prices(directions, entry_prices, atrs, atr_multipliers, nearest_levels, max_stop_pcts):
+    """
+    Array version of _compute_stop_price for a batch of positions
+
+    All arguments are arrays of the same length (float64, except ATRs which may be float32);
+    returns the capped stop prices as float64.
+    """
+    atr_stop_distances = atrs * atr_multipliers
+    signed_entries = directions * entry_prices
+    signed_atr_stops = signed_entries - atr_stop_distances
+    signed_capped_prices = signed_entries - entry_prices * max_stop_pcts
+
+    use_level = (nearest_levels != 0.0) & (signed_entries - directions * nearest_levels <= atr_stop_distances * 1.5)
+    signed_level_stops = np.where(use_level, directions * nearest_levels - atrs * 0.05, signed_atr_stops)
+    return directions * np.maximum(np.maximum(signed_atr_stops, signed_level_stops), signed_capped_prices)
+
+
+@njit(cache=True, fastmath=True)
+def _round_step_size(quantity, step_size):
+    """Native version of risk_manager.round_step_size (round a quantity down to the step size)"""
+    scale = 10.0 ** int(round(-math.log10(step_size)))
+    return math.floor(quantity * scale) / scale
+
+
+# Use the ahead-of-time compiled kernels when they have been built with build_risk_kernels.py,
+# so live trading never waits on the JIT compiler for the first stop loss
+try:
+    from modules import _risk_kernels
+except ImportError:
+    _risk_kernels = None
+
+if _risk_kernels is not None:
+    _weighted_atr = _risk_kernels.weighted_atr
+    _swing_pivots = _risk_kernels.swing_pivots
+    _nearest_levels = _risk_kernels.nearest_levels
+    _compute_stop_price = _risk_kernels.compute_stop_price
+    _stop_prices = _risk_kernels.stop_prices
@@ -9,6 +9,9 @@ from modules.config import (
 
 logger = logging.getLogger(__name__)
 
+# How long (in seconds) the all-symbols position list is reused between calls
+POSITIONS_CACHE_TTL = 3
+
 class BinanceClient:
     def __init__(self):
         if not API_KEY or not API_SECRET:
@@ -17,6 +20,8 @@ class BinanceClient:
         self.client = self._initialize_client()
         self.futures_initialized = False
         self.use_spot_fallback = False  # Flag to indicate if we should fall back to spot API
+        self._positions_cache = None  # Last futures_position_information() response
+        self._positions_cache_ts = 0.0
         
     def _initialize_client(self):
         for attempt in range(RETRY_COUNT):
@@ -274,6 +279,22 @@ class BinanceClient:
         logger.error("Maximum retries reached when getting position info")
         return None
     
+    def get_all_positions(self):
+        """
+        Get raw position information for all symbols
+        
+        Bursts of calls within POSITIONS_CACHE_TTL seconds share one REST request.
+        The cache is cleared whenever a market order is placed.
+        """
+        now = time.monotonic()
+        if self._positions_cache is not None and now - self._positions_cache_ts < POSITIONS_CACHE_TTL:
+            return self._positions_cache
+            
+        positions = self.client.futures_position_information()
+        self._positions_cache = positions
+        self._positions_cache_ts = now
+        return positions
+    
     def get_symbol_info(self, symbol):
         """Get symbol information like price precision, quantity precision, etc."""
         max_retries = 3
@@ -284,12 +305,16 @@ class BinanceClient:
                 exchange_info = self.client.futures_exchange_info()
                 for symbol_info in exchange_info['symbols']:
                     if symbol_info['symbol'] == symbol:
+                        # Stop at the first matching filter instead of building a list to take [0] from
+                        filters = symbol_info['filters']
+                        lot_size = next(f for f in filters if f['filterType'] == 'LOT_SIZE')
+                        min_notional = next(f for f in filters if f['filterType'] == 'MIN_NOTIONAL')
                         return {
                             'price_precision': symbol_info['pricePrecision'],
                             'quantity_precision': symbol_info['quantityPrecision'],
-                            'min_qty': float([f for f in symbol_info['filters'] if f['filterType'] == 'LOT_SIZE'][0]['minQty']),
-                            'max_qty': float([f for f in symbol_info['filters'] if f['filterType'] == 'LOT_SIZE'][0]['maxQty']),
-                            'min_notional': float([f for f in symbol_info['filters'] if f['filterType'] == 'MIN_NOTIONAL'][0]['notional'])
+                            'min_qty': float(lot_size['minQty']),
+                            'max_qty': float(lot_size['maxQty']),
+                            'min_notional': float(min_notional['notional'])
                         }
                 return None
             except Exception as e:
@@ -436,6 +461,8 @@ class BinanceClient:
                     type="MARKET",
                     quantity=quantity
                 )
+                # Open positions have changed, so the cached position list is stale
+                self._positions_cache = None
                 logger.info(f"Placed {side} market order for {quantity} {symbol}")
                 return order
             except Exception as e:
@@ -1,7 +1,10 @@
 import logging
 import math
-import pandas as pd
-import ta
+import time
+from collections import namedtuple
+from enum import IntEnum
+from functools import lru_cache
+import numpy as np
 from modules.config import (
     INITIAL_BALANCE, RISK_PER_TRADE, MAX_OPEN_POSITIONS,
     USE_STOP_LOSS, STOP_LOSS_PCT, USE_TAKE_PROFIT, 
@@ -18,6 +21,51 @@ from modules.config import (
 
 logger = logging.getLogger(__name__)
 
+# How long (in seconds) exchange symbol info is reused before being fetched again
+SYMBOL_INFO_CACHE_TTL = 60
+# How long (in seconds) a symbol's open orders are reused within one trading cycle
+OPEN_ORDERS_CACHE_TTL = 1
+# Fraction of the position closed at each partial take profit level
+PARTIAL_TP_CLOSE_FRACTIONS = (0.3, 0.4, 0.3)
+
+# Exchange symbol info as used by RiskManager, with the rounding scales and step size precomputed
+SymbolInfo = namedtuple('SymbolInfo', [
+    'price_precision', 'quantity_precision', 'min_qty', 'max_qty', 'min_notional',
+    'price_scale', 'quantity_scale', 'step_size',
+])
+
+
+class MarketCondition(IntEnum):
+    """Market conditions as small integers so per-condition settings can be looked up by index"""
+    BULLISH = 0
+    BEARISH = 1
+    SIDEWAYS = 2
+    EXTREME_BULLISH = 3
+    EXTREME_BEARISH = 4
+    UNKNOWN = 5
+
+
+_MARKET_CONDITION_IDS = {condition.name: condition for condition in MarketCondition}
+
+# Per-condition settings for the volatility based stop loss, indexed by MarketCondition
+# ATR multiplier: wider stops in trends, tighter in bear and sideways markets
+ATR_MULTIPLIERS = (2.0, 1.5, 1.0, 2.5, 1.3, 1.0)
+# Maximum stop distance as a fraction of STOP_LOSS_PCT, tighter when trading against the trend
+MAX_STOP_FACTORS_LONG = (1.0, 0.9, 1.0, 1.0, 0.8, 1.0)
+MAX_STOP_FACTORS_SHORT = (0.9, 1.0, 1.0, 0.8, 1.0, 1.0)
+# Maximum stop distance as a fraction of the entry price, indexed by [side == "BUY"][MarketCondition]
+_MAX_STOP_PCTS = (
+    tuple(STOP_LOSS_PCT * factor for factor in MAX_STOP_FACTORS_SHORT),
+    tuple(STOP_LOSS_PCT * factor for factor in MAX_STOP_FACTORS_LONG),
+)
+
+
+@lru_cache(maxsize=64)
+def _is_raysol(symbol):
+    """RAYSOL tokens have higher volatility and get wider stops"""
+    return 'RAYSOL' in symbol
+
+
 class RiskManager:
     def __init__(self, binance_client):
         """Initialize risk manager with a reference to binance client"""
@@ -25,7 +73,129 @@ class RiskManager:
         self.initial_balance = None
         self.last_known_balance = None
         self.current_market_condition = None  # Will be set to 'BULLISH', 'BEARISH', 'EXTREME_BULLISH', or 'EXTREME_BEARISH'
+        self.current_market_condition_id = MarketCondition.UNKNOWN  # Integer form of current_market_condition
         self.position_size_multiplier = 1.0  # Default position size multiplier
+        self._symbol_info_cache = {}  # symbol -> SymbolInfo
+        self._symbol_info_ts = {}  # symbol -> time.monotonic() of last fetch
+        self._price_precision = {}  # symbol -> price precision, refreshed whenever symbol info is fetched
+        self._open_orders_cache = {}  # symbol -> (time.monotonic() of fetch, open orders)
+        self._initial_stop_cache = {}  # (symbol, side, entry_price) -> stop price, for the current market condition
+        self._klines_cache = {}  # symbol -> (klines key, (atr, swing highs, swing lows))
+        self._leverage_cache = {}  # symbol -> leverage reported by the exchange
+        
+        # Risk percentages per market condition (None = default settings for any other condition)
+        # sl/tp: stop loss/take profit, tsl/ttp: trailing stop/trailing take profit,
+        # tp_multipliers: partial take profit levels as multiples of the take profit percentage
+        self._risk_params = {
+            'BULLISH': {
+                'sl': STOP_LOSS_PCT_BULLISH, 'tp': TAKE_PROFIT_PCT_BULLISH,
+                'tsl': TRAILING_STOP_PCT_BULLISH, 'ttp': TRAILING_TAKE_PROFIT_PCT_BULLISH,
+                'tp_multipliers': (0.5, 1.0, 1.5),  # 150% of target on the last level
+            },
+            'BEARISH': {
+                'sl': STOP_LOSS_PCT_BEARISH, 'tp': TAKE_PROFIT_PCT_BEARISH,
+                'tsl': TRAILING_STOP_PCT_BEARISH, 'ttp': TRAILING_TAKE_PROFIT_PCT_BEARISH,
+                'tp_multipliers': (0.5, 1.0, 1.3),  # Only 130% of target in bearish markets
+            },
+            'SIDEWAYS': {
+                'sl': STOP_LOSS_PCT_SIDEWAYS, 'tp': TAKE_PROFIT_PCT_SIDEWAYS,
+                'tsl': TRAILING_STOP_PCT_SIDEWAYS, 'ttp': TRAILING_TAKE_PROFIT_PCT_SIDEWAYS,
+                'tp_multipliers': (0.7, 1.0, 1.2),  # Take profits quicker, conservative extension
+            },
+            None: {
+                'sl': STOP_LOSS_PCT, 'tp': TAKE_PROFIT_PCT,
+                'tsl': TRAILING_STOP_PCT, 'ttp': TRAILING_TAKE_PROFIT_PCT,
+                'tp_multipliers': (0.5, 1.0, 1.5),
+            },
+        }
+        for params in self._risk_params.values():
+            params['sl_raysol'] = params['sl'] * 1.5  # 50% wider stops for RAYSOL tokens
+            params['tp_multipliers'] = np.array(params['tp_multipliers'])
+        # Risk parameters indexed by MarketCondition (extreme and unknown conditions use the defaults)
+        self._params_by_condition = tuple(
+            self._risk_params.get(condition.name, self._risk_params[None]) for condition in MarketCondition
+        )
+        self._active_params = self._risk_params[None]
+        
+    def _get_symbol_info(self, symbol):
+        """Get symbol info, reusing a cached copy for up to SYMBOL_INFO_CACHE_TTL seconds"""
+        now = time.monotonic()
+        symbol_info = self._symbol_info_cache.get(symbol)
+        if symbol_info is not None and now - self._symbol_info_ts[symbol] < SYMBOL_INFO_CACHE_TTL:
+            return symbol_info
+            
+        info = self.binance_client.get_symbol_info(symbol)
+        # Only cache successful lookups so a failed request is retried on the next call
+        if not info:
+            return None
+            
+        # Convert once per fetch so hot paths use attribute access, with the
+        # rounding scales and step size precomputed instead of once per price/order
+        symbol_info = SymbolInfo(
+            price_precision=info['price_precision'],
+            quantity_precision=info['quantity_precision'],
+            min_qty=info['min_qty'],
+            max_qty=info['max_qty'],
+            min_notional=info['min_notional'],
+            price_scale=10 ** info['price_precision'],
+            quantity_scale=10 ** info['quantity_precision'],
+            step_size=get_step_size(info['min_qty']),
+        )
+        self._symbol_info_cache[symbol] = symbol_info
+        self._symbol_info_ts[symbol] = now
+        self._price_precision[symbol] = symbol_info.price_precision
+        return symbol_info
+        
+    def load_symbol_info(self, symbol):
+        """Fetch symbol info (and the symbol's price precision) ahead of the first trade"""
+        symbol_info = self._get_symbol_info(symbol)
+        if not symbol_info:
+            logger.warning(f"Could not preload symbol info for {symbol}")
+        return symbol_info
+        
+    def _get_price_precision(self, symbol):
+        """Price precision for a symbol without going through the symbol info TTL check (None if unavailable)"""
+        precision = self._price_precision.get(symbol)
+        if precision is None and self._get_symbol_info(symbol):
+            precision = self._price_precision[symbol]
+        return precision
+        
+    @staticmethod
+    def _round_price(symbol_info, price):
+        """Round a price to the symbol's price precision (unchanged if symbol info is unavailable)"""
+        if not symbol_info:
+            return price
+        return round(price, symbol_info.price_precision)
+        
+    @staticmethod
+    def _floor_price(symbol_info, price):
+        """Round a price down to the symbol's tick"""
+        scale = symbol_info.price_scale
+        return math.floor(price * scale) / scale
+        
+    @staticmethod
+    def _ceil_price(symbol_info, price):
+        """Round a price up to the symbol's tick"""
+        scale = symbol_info.price_scale
+        return math.ceil(price * scale) / scale
+        
+    def _get_open_orders(self, symbol):
+        """Get open futures orders for a symbol, reusing a fetch from the last OPEN_ORDERS_CACHE_TTL seconds"""
+        now = time.monotonic()
+        cached = self._open_orders_cache.get(symbol)
+        if cached is not None and now - cached[0] < OPEN_ORDERS_CACHE_TTL:
+            return cached[1]
+            
+        open_orders = self.binance_client.client.futures_get_open_orders(symbol=symbol)
+        self._open_orders_cache[symbol] = (now, open_orders)
+        return open_orders
+        
+    def invalidate_open_orders(self, symbol=None):
+        """Drop cached open orders for a symbol (or all symbols) after orders have changed"""
+        if symbol is None:
+            self._open_orders_cache.clear()
+        else:
+            self._open_orders_cache.pop(symbol, None)
         
     def set_market_condition(self, market_condition):
         """Set the current market condition for adaptive risk management"""
@@ -33,9 +203,15 @@ class RiskManager:
             if self.current_market_condition != market_condition:
                 logger.info(f"Market condition changed to {market_condition}")
                 self.current_market_condition = market_condition
+                self._initial_stop_cache.clear()
         else:
             logger.warning(f"Invalid market condition: {market_condition}. Using BULLISH as default.")
+            if self.current_market_condition != 'BULLISH':
+                self._initial_stop_cache.clear()
             self.current_market_condition = 'BULLISH'
+            
+        self.current_market_condition_id = _MARKET_CONDITION_IDS.get(self.current_market_condition, MarketCondition.UNKNOWN)
+        self._active_params = self._params_by_condition[self.current_market_condition_id]
     
     def update_position_sizing(self, position_size_multiplier):
         """
@@ -86,7 +262,7 @@ class RiskManager:
             return 0
             
         # Get symbol info for precision
-        symbol_info = self.binance_client.get_symbol_info(symbol)
+        symbol_info = self._get_symbol_info(symbol)
         if not symbol_info:
             logger.error(f"Could not retrieve symbol info for {symbol}")
             return 0
@@ -101,6 +277,7 @@ class RiskManager:
             logger.info(f"Small account detected (${balance:.2f}). Using {effective_risk*100:.1f}% risk per trade.")
             
         risk_amount = balance * effective_risk
+        leverage = None  # Only looked up when the sizing below needs it
         
         # Calculate position size based on risk and stop loss
         if stop_loss_price and USE_STOP_LOSS:
@@ -118,27 +295,29 @@ class RiskManager:
             max_quantity = (balance * effective_risk * leverage) / price
         
         # Apply precision to quantity
-        quantity_precision = symbol_info['quantity_precision']
-        quantity = round_step_size(max_quantity, get_step_size(symbol_info['min_qty']))
+        qscale = symbol_info.quantity_scale  # 10 ** quantity_precision
+        quantity = round_step_size(max_quantity, symbol_info.step_size)
         
         # Check minimum notional
-        min_notional = symbol_info['min_notional']
+        min_notional = symbol_info.min_notional
         if quantity * price < min_notional:
             logger.warning(f"Position size too small - below minimum notional of {min_notional}")
             
             # For small accounts, force minimum notional even if it exceeds normal risk parameters
             if small_account:
-                min_quantity = math.ceil(min_notional / price * 10**quantity_precision) / 10**quantity_precision
+                if leverage is None:
+                    leverage = self.get_current_leverage(symbol)
+                min_quantity = math.ceil(min_notional / price * qscale) / qscale
                 
                 # Make sure we don't use more than 50% of balance for very small accounts
                 max_safe_quantity = (balance * 0.5 * leverage) / price
-                max_safe_quantity = math.floor(max_safe_quantity * 10**quantity_precision) / 10**quantity_precision
+                max_safe_quantity = math.floor(max_safe_quantity * qscale) / qscale
                 
                 quantity = min(min_quantity, max_safe_quantity)
                 
                 if quantity * price / leverage > balance * 0.5:
                     logger.warning("Position would use more than 50% of balance - reducing size")
-                    quantity = math.floor((balance * 0.5 * leverage / price) * 10**quantity_precision) / 10**quantity_precision
+                    quantity = math.floor((balance * 0.5 * leverage / price) * qscale) / qscale
                 
                 if quantity > 0:
                     logger.info(f"Small account: Adjusted position size to meet minimum notional: {quantity}")
@@ -148,7 +327,7 @@ class RiskManager:
             else:
                 # Normal account handling
                 if min_notional / price <= max_quantity:
-                    quantity = math.ceil(min_notional / price * 10**quantity_precision) / 10**quantity_precision
+                    quantity = math.ceil(min_notional / price * qscale) / qscale
                     logger.info(f"Adjusted position size to meet minimum notional: {quantity}")
                 else:
                     logger.error(f"Cannot meet minimum notional with current risk settings")
@@ -158,11 +337,24 @@ class RiskManager:
         return quantity
         
     def get_current_leverage(self, symbol):
-        """Get the current leverage for a symbol"""
+        """Get the current leverage for a symbol, cached until invalidate_leverage is called"""
+        leverage = self._leverage_cache.get(symbol)
+        if leverage is not None:
+            return leverage
+            
         position_info = self.binance_client.get_position_info(symbol)
         if position_info:
-            return position_info['leverage']
-        return 1  # Default to 1x if no position info
+            leverage = position_info['leverage']
+            self._leverage_cache[symbol] = leverage
+            return leverage
+        return 1  # Default to 1x if no position info (not cached so the real leverage is picked up later)
+        
+    def invalidate_leverage(self, symbol=None):
+        """Drop the cached leverage for a symbol (or all symbols) after the leverage has been changed"""
+        if symbol is None:
+            self._leverage_cache.clear()
+        else:
+            self._leverage_cache.pop(symbol, None)
         
     def should_open_position(self, symbol):
         """Check if a new position should be opened based on risk rules"""
@@ -175,46 +367,35 @@ class RiskManager:
         # Check maximum number of open positions (only for the current trading symbol)
         # This allows separate bot instances for different trading pairs to operate independently
         if MULTI_INSTANCE_MODE:
-            # In multi-instance mode, only count positions for the current symbol
-            positions = self.binance_client.client.futures_position_information()
-            # Check if we've reached the max positions for this symbol
-            symbol_positions = [p for p in positions if p['symbol'] == symbol and float(p['positionAmt']) != 0]
-            if len(symbol_positions) >= MAX_POSITIONS_PER_SYMBOL:
+            # In multi-instance mode, only count positions for the current symbol. The check above
+            # already returned if this symbol has an open position, so no other lookup is needed.
+            if MAX_POSITIONS_PER_SYMBOL < 1:
                 logger.info(f"Maximum number of positions for {symbol} ({MAX_POSITIONS_PER_SYMBOL}) reached")
                 return False
         else:
-            # Original behavior - count all positions
-            positions = self.binance_client.client.futures_position_information()
-            open_positions = [p for p in positions if float(p['positionAmt']) != 0]
-            if len(open_positions) >= MAX_OPEN_POSITIONS:
+            # Original behavior - count all positions, stopping as soon as the limit is reached
+            positions = self.binance_client.get_all_positions()
+            open_positions = 0
+            for p in positions:
+                if float(p['positionAmt']) != 0:
+                    open_positions += 1
+                    if open_positions >= MAX_OPEN_POSITIONS:
+                        break
+            if open_positions >= MAX_OPEN_POSITIONS:
                 logger.info(f"Maximum number of open positions ({MAX_OPEN_POSITIONS}) reached")
                 return False
             
         return True
         
-    def calculate_stop_loss(self, symbol, side, entry_price):
-        """Calculate stop loss price based on configuration and market condition"""
-        if not USE_STOP_LOSS:
-            return None
-            
-        # Special handling for RAYSOL tokens which have higher volatility
-        is_raysol = 'RAYSOL' in symbol
-            
-        # Choose stop loss percentage based on market condition
-        if self.current_market_condition == 'BULLISH':
-            stop_loss_pct = STOP_LOSS_PCT_BULLISH
-        elif self.current_market_condition == 'BEARISH':
-            stop_loss_pct = STOP_LOSS_PCT_BEARISH
-        elif self.current_market_condition == 'SIDEWAYS':
-            stop_loss_pct = STOP_LOSS_PCT_SIDEWAYS
-        else:
-            stop_loss_pct = STOP_LOSS_PCT  # Default
-            
-        # For RAYSOL tokens, add more buffer to the stop loss
-        if is_raysol:
-            original_pct = stop_loss_pct
-            stop_loss_pct = stop_loss_pct * 1.5  # 50% wider stops for RAYSOL tokens
-            logger.info(f"RAYSOL token detected: Increasing stop loss percentage from {original_pct*100:.2f}% to {stop_loss_pct*100:.2f}%")
+    def _percentage_stop_loss(self, symbol, side, entry_price, symbol_info):
+        """
+        Percentage-based stop loss for the current market condition, without logging
+        
+        Returns:
+            tuple: (stop price rounded to the symbol's price precision, stop loss percentage used)
+        """
+        # Choose stop loss percentage based on market condition (with extra buffer for RAYSOL tokens)
+        stop_loss_pct = self._active_params['sl_raysol' if _is_raysol(symbol) else 'sl']
             
         if side == "BUY":  # Long position
             stop_price = entry_price * (1 - stop_loss_pct)
@@ -222,15 +403,26 @@ class RiskManager:
             stop_price = entry_price * (1 + stop_loss_pct)
             
         # Apply price precision
-        symbol_info = self.binance_client.get_symbol_info(symbol)
-        if symbol_info:
-            price_precision = symbol_info['price_precision']
-            stop_price = round(stop_price, price_precision)
+        stop_price = self._round_price(symbol_info, stop_price)
+            
+        return stop_price, stop_loss_pct
+        
+    def calculate_stop_loss(self, symbol, side, entry_price):
+        """Calculate stop loss price based on configuration and market condition"""
+        if not USE_STOP_LOSS:
+            return None
+            
+        symbol_info = self._get_symbol_info(symbol)
+        stop_price, stop_loss_pct = self._percentage_stop_loss(symbol, side, entry_price, symbol_info)
             
-        if is_raysol:
-            logger.info(f"Calculated RAYSOL-specific {self.current_market_condition} stop loss at {stop_price} ({stop_loss_pct*100:.2f}%, enhanced buffer active)")
+        # Special handling for RAYSOL tokens which have higher volatility
+        if _is_raysol(symbol):
+            logger.info("RAYSOL token detected: Increasing stop loss percentage from %.2f%% to %.2f%%",
+                        self._active_params['sl'] * 100, stop_loss_pct * 100)
+            logger.info("Calculated RAYSOL-specific %s stop loss at %s (%.2f%%, enhanced buffer active)",
+                        self.current_market_condition, stop_price, stop_loss_pct * 100)
         else:
-            logger.info(f"Calculated {self.current_market_condition} stop loss at {stop_price} ({stop_loss_pct*100}%)")
+            logger.info("Calculated %s stop loss at %s (%s%%)", self.current_market_condition, stop_price, stop_loss_pct * 100)
         return stop_price
         
     def calculate_take_profit(self, symbol, side, entry_price):
@@ -239,14 +431,7 @@ class RiskManager:
             return None
             
         # Choose take profit percentage based on market condition
-        if self.current_market_condition == 'BULLISH':
-            take_profit_pct = TAKE_PROFIT_PCT_BULLISH
-        elif self.current_market_condition == 'BEARISH':
-            take_profit_pct = TAKE_PROFIT_PCT_BEARISH
-        elif self.current_market_condition == 'SIDEWAYS':
-            take_profit_pct = TAKE_PROFIT_PCT_SIDEWAYS
-        else:
-            take_profit_pct = TAKE_PROFIT_PCT  # Default
+        take_profit_pct = self._active_params['tp']
             
         if side == "BUY":  # Long position
             take_profit_price = entry_price * (1 + take_profit_pct)
@@ -254,14 +439,108 @@ class RiskManager:
             take_profit_price = entry_price * (1 - take_profit_pct)
             
         # Apply price precision
-        symbol_info = self.binance_client.get_symbol_info(symbol)
-        if symbol_info:
-            price_precision = symbol_info['price_precision']
+        price_precision = self._get_price_precision(symbol)
+        if price_precision is not None:
             take_profit_price = round(take_profit_price, price_precision)
             
-        logger.info(f"Calculated {self.current_market_condition} take profit at {take_profit_price} ({take_profit_pct*100}%)")
+        logger.info("Calculated %s take profit at %s (%s%%)", self.current_market_condition, take_profit_price, take_profit_pct * 100)
         return take_profit_price
         
+    def _round_prices_batch(self, symbols, prices):
+        """
+        Round an array of prices to each symbol's price precision
+        
+        Symbols are grouped so each distinct precision is rounded in a single NumPy call.
+        Prices for symbols whose info can't be retrieved are left unrounded.
+        """
+        unique_symbols, inverse = np.unique(symbols, return_inverse=True)
+        precisions = np.full(len(unique_symbols), -1)
+        for i, symbol in enumerate(unique_symbols):
+            symbol_info = self._get_symbol_info(symbol)
+            if symbol_info:
+                precisions[i] = symbol_info.price_precision
+        precisions = precisions[inverse]
+        
+        for precision in np.unique(precisions):
+            if precision < 0:
+                continue
+            mask = precisions == precision
+            prices[mask] = np.round(prices[mask], precision)
+        return prices
+    
+    def calculate_stop_loss_batch(self, symbols, sides, entry_prices):
+        """
+        Vectorized calculate_stop_loss for several positions at once
+        
+        Args:
+            symbols: Sequence of trading pair symbols
+            sides: Sequence of 'BUY' or 'SELL', one per symbol
+            entry_prices: Sequence of entry prices, one per symbol
+        
+        Returns:
+            ndarray: Stop loss prices rounded to each symbol's price precision, or None if stop losses are disabled
+        """
+        if not USE_STOP_LOSS:
+            return None
+        
+        symbols = np.asarray(symbols)
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        
+        # Per-position stop loss percentage (with extra buffer for RAYSOL tokens), negative for longs
+        raysol = np.char.find(symbols.astype(str), 'RAYSOL') >= 0
+        stop_loss_pct = np.where(raysol, self._active_params['sl_raysol'], self._active_params['sl'])
+        pct = np.where(np.asarray(sides) == 'BUY', -stop_loss_pct, stop_loss_pct)
+        
+        stop_prices = self._round_prices_batch(symbols, entry_prices * (1 + pct))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calculated %s stop losses for %d positions", self.current_market_condition, len(stop_prices))
+        return stop_prices
+    
+    def calculate_take_profit_batch(self, symbols, sides, entry_prices):
+        """
+        Vectorized calculate_take_profit for several positions at once
+        
+        Args:
+            symbols: Sequence of trading pair symbols
+            sides: Sequence of 'BUY' or 'SELL', one per symbol
+            entry_prices: Sequence of entry prices, one per symbol
+        
+        Returns:
+            ndarray: Take profit prices rounded to each symbol's price precision, or None if take profits are disabled
+        """
+        if not USE_TAKE_PROFIT:
+            return None
+        
+        symbols = np.asarray(symbols)
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        
+        take_profit_pct = self._active_params['tp']
+        pct = np.where(np.asarray(sides) == 'BUY', take_profit_pct, -take_profit_pct)
+        
+        take_profit_prices = self._round_prices_batch(symbols, entry_prices * (1 + pct))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calculated %s take profits for %d positions", self.current_market_condition, len(take_profit_prices))
+        return take_profit_prices
+    
+    def _initial_stop_loss(self, symbol, side, entry_price, symbol_info):
+        """
+        Percentage-based stop loss for a position's entry price, as used by trailing stops
+        
+        The result only depends on the entry price and the market condition, so it is cached
+        until the market condition changes instead of being recomputed on every tick.
+        """
+        if not USE_STOP_LOSS:
+            return None
+            
+        key = (symbol, side, entry_price)
+        stop_price = self._initial_stop_cache.get(key)
+        if stop_price is None:
+            stop_price, _ = self._percentage_stop_loss(symbol, side, entry_price, symbol_info)
+            # Don't cache an unrounded price from a failed symbol info lookup
+            if symbol_info:
+                self._initial_stop_cache[key] = stop_price
+        return stop_price
+        
     def adjust_stop_loss_for_trailing(self, symbol, side, current_price, position_info=None):
         """Adjust stop loss for trailing stop if needed"""
         if not TRAILING_STOP:
@@ -280,42 +559,37 @@ class RiskManager:
             logger.warning(f"Position symbol mismatch: expected {symbol}, got {position_info['symbol']}")
             return None
             
-        entry_price = position_info['entry_price']
+        entry_price = float(position_info['entry_price'])
         
         # Choose trailing stop percentage based on market condition
-        if self.current_market_condition == 'BULLISH':
-            trailing_stop_pct = TRAILING_STOP_PCT_BULLISH
-        elif self.current_market_condition == 'BEARISH':
-            trailing_stop_pct = TRAILING_STOP_PCT_BEARISH
-        elif self.current_market_condition == 'SIDEWAYS':
-            trailing_stop_pct = TRAILING_STOP_PCT_SIDEWAYS
-        else:
-            trailing_stop_pct = TRAILING_STOP_PCT  # Default
+        trailing_stop_pct = self._active_params['tsl']
+            
+        # Fetch symbol info once and share it with the initial stop loss lookup below
+        symbol_info = self._get_symbol_info(symbol)
         
         # Calculate new stop loss based on current price
         if side == "BUY":  # Long position
             new_stop = current_price * (1 - trailing_stop_pct)
             # Only move stop loss up, never down
-            current_stop = self.calculate_stop_loss(symbol, side, entry_price)
+            current_stop = self._initial_stop_loss(symbol, side, entry_price, symbol_info)
             if current_stop and new_stop <= current_stop:
-                logger.debug(f"Not adjusting trailing stop for long position: current ({current_stop}) > calculated ({new_stop})")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Not adjusting trailing stop for long position: current ({current_stop}) > calculated ({new_stop})")
                 return None
         else:  # Short position
             new_stop = current_price * (1 + trailing_stop_pct)
             # Only move stop loss down, never up
-            current_stop = self.calculate_stop_loss(symbol, side, entry_price)
+            current_stop = self._initial_stop_loss(symbol, side, entry_price, symbol_info)
             if current_stop and new_stop >= current_stop:
-                logger.debug(f"Not adjusting trailing stop for short position: current ({current_stop}) < calculated ({new_stop})")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Not adjusting trailing stop for short position: current ({current_stop}) < calculated ({new_stop})")
                 return None
                 
         # Apply price precision
-        symbol_info = self.binance_client.get_symbol_info(symbol)
-        if symbol_info:
-            price_precision = symbol_info['price_precision']
-            new_stop = round(new_stop, price_precision)
+        new_stop = self._round_price(symbol_info, new_stop)
             
-        logger.info(f"Adjusted {self.current_market_condition} trailing stop loss to {new_stop} ({trailing_stop_pct*100}%)")
-        logger.info(f"Current price: {current_price}, Entry price: {entry_price}, Stop loss moved: {current_stop} -> {new_stop}")
+        logger.info("Adjusted %s trailing stop loss to %s (%s%%)", self.current_market_condition, new_stop, trailing_stop_pct * 100)
+        logger.info("Current price: %s, Entry price: %s, Stop loss moved: %s -> %s", current_price, entry_price, current_stop, new_stop)
         return new_stop
         
     def adjust_take_profit_for_trailing(self, symbol, side, current_price, position_info=None):
@@ -342,86 +616,49 @@ class RiskManager:
             return None
         
         # Get symbol info for precision
-        symbol_info = self.binance_client.get_symbol_info(symbol)
+        symbol_info = self._get_symbol_info(symbol)
         if not symbol_info:
             return None
             
-        price_precision = symbol_info.get('price_precision', 2)
-        
         # Choose trailing take profit percentage based on market condition
-        if self.current_market_condition == 'BULLISH':
-            trailing_take_profit_pct = TRAILING_TAKE_PROFIT_PCT_BULLISH
-        elif self.current_market_condition == 'BEARISH':
-            trailing_take_profit_pct = TRAILING_TAKE_PROFIT_PCT_BEARISH
-        elif self.current_market_condition == 'SIDEWAYS':
-            trailing_take_profit_pct = TRAILING_TAKE_PROFIT_PCT_SIDEWAYS
-        else:
-            trailing_take_profit_pct = TRAILING_TAKE_PROFIT_PCT  # Default
-        
-        # Calculate the current dynamic take profit level based on the current price
-        if side == 'BUY':  # Long position
-            # For long positions, we want take profit to trail above the price
-            current_take_profit = current_price * (1 + trailing_take_profit_pct)
-            current_take_profit = math.floor(current_take_profit * 10**price_precision) / 10**price_precision
-            
-            # Check if there are open orders specifically for this symbol
-            open_orders = self.binance_client.client.futures_get_open_orders(symbol=symbol)
-            
-            # Find the current take profit order if it exists - only for this specific symbol
-            # This is crucial for multi-instance mode to prevent conflicts between different trading pairs
-            existing_take_profit = None
-            for order in open_orders:
-                if (order['symbol'] == symbol and 
-                    order['type'] == 'TAKE_PROFIT_MARKET' and 
-                    order['side'] == 'SELL'):
-                    existing_take_profit = float(order['stopPrice'])
-                    break
-            
-            # If no existing take profit or our new one is better (higher for long), return the new one
-            if not existing_take_profit:
-                logger.info(f"Long position: Setting initial {self.current_market_condition} take profit to {current_take_profit} ({trailing_take_profit_pct*100}%)")
-                logger.info(f"Current price: {current_price}, Entry price: {entry_price}")
-                return current_take_profit
-            elif current_take_profit > existing_take_profit:
-                logger.info(f"Long position: Adjusting {self.current_market_condition} take profit from {existing_take_profit} to {current_take_profit} ({trailing_take_profit_pct*100}%)")
-                logger.info(f"Current price: {current_price}, Entry price: {entry_price}, Take profit moved: {existing_take_profit} -> {current_take_profit}")
-                return current_take_profit
-            else:
-                logger.debug(f"Not adjusting trailing take profit for long position: current ({existing_take_profit}) > calculated ({current_take_profit})")
-                return None
-                
-        elif side == 'SELL':  # Short position
-            # For short positions, we want take profit to trail below the price
-            current_take_profit = current_price * (1 - trailing_take_profit_pct)
-            current_take_profit = math.ceil(current_take_profit * 10**price_precision) / 10**price_precision
-            
-            # Check if there are open orders specifically for this symbol
-            open_orders = self.binance_client.client.futures_get_open_orders(symbol=symbol)
-            
-            # Find the current take profit order if it exists - only for this specific symbol
-            # This is crucial for multi-instance mode to prevent conflicts between different trading pairs
-            existing_take_profit = None
-            for order in open_orders:
-                if (order['symbol'] == symbol and
-                    order['type'] == 'TAKE_PROFIT_MARKET' and 
-                    order['side'] == 'BUY'):
-                    existing_take_profit = float(order['stopPrice'])
-                    break
-            
-            # If no existing take profit or our new one is better (lower), return the new one
-            if not existing_take_profit:
-                logger.info(f"Short position: Setting initial {self.current_market_condition} take profit to {current_take_profit} ({trailing_take_profit_pct*100}%)")
-                logger.info(f"Current price: {current_price}, Entry price: {entry_price}")
-                return current_take_profit
-            elif current_take_profit < existing_take_profit:
-                logger.info(f"Short position: Adjusting {self.current_market_condition} take profit from {existing_take_profit} to {current_take_profit} ({trailing_take_profit_pct*100}%)")
-                logger.info(f"Current price: {current_price}, Entry price: {entry_price}, Take profit moved: {existing_take_profit} -> {current_take_profit}")
-                return current_take_profit
-            else:
-                logger.debug(f"Not adjusting trailing take profit for short position: current ({existing_take_profit}) < calculated ({current_take_profit})")
-                return None
+        trailing_take_profit_pct = self._active_params['ttp']
         
-        return None
+        if side == 'BUY':  # Long position: take profit trails above the price and may only move up
+            sign, direction, closing_side, round_to_tick = 1, "Long", 'SELL', self._floor_price
+        elif side == 'SELL':  # Short position: take profit trails below the price and may only move down
+            sign, direction, closing_side, round_to_tick = -1, "Short", 'BUY', self._ceil_price
+        else:
+            return None
+            
+        # Check if there are open orders specifically for this symbol (fetched once per cycle).
+        # The exchange filters by symbol, which keeps multi-instance bots from seeing each other's orders.
+        open_orders = self._get_open_orders(symbol)
+        
+        # Calculate the current dynamic take profit level based on the current price,
+        # rounded to the tick towards the current price
+        current_take_profit = current_price * (1 + sign * trailing_take_profit_pct)
+        current_take_profit = round_to_tick(symbol_info, current_take_profit)
+        
+        # Find the current take profit order if it exists (placed on the closing side)
+        existing_take_profit = _find_existing_tp(open_orders, closing_side)
+        
+        # If no existing take profit or our new one is better (further in the trade's direction), return the new one
+        if not existing_take_profit:
+            logger.info("%s position: Setting initial %s take profit to %s (%s%%)",
+                        direction, self.current_market_condition, current_take_profit, trailing_take_profit_pct * 100)
+            logger.info("Current price: %s, Entry price: %s", current_price, entry_price)
+            return current_take_profit
+        elif sign * current_take_profit > sign * existing_take_profit:
+            logger.info("%s position: Adjusting %s take profit from %s to %s (%s%%)",
+                        direction, self.current_market_condition, existing_take_profit, current_take_profit,
+                        trailing_take_profit_pct * 100)
+            logger.info("Current price: %s, Entry price: %s, Take profit moved: %s -> %s",
+                        current_price, entry_price, existing_take_profit, current_take_profit)
+            return current_take_profit
+        else:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Not adjusting trailing take profit for {direction.lower()} position: current ({existing_take_profit}) {'>' if sign > 0 else '<'} calculated ({current_take_profit})")
+            return None
         
     def update_balance_for_compounding(self):
         """Update balance tracking for auto-compounding"""
@@ -462,54 +699,65 @@ class RiskManager:
         if not USE_TAKE_PROFIT:
             return []
             
-        # Choose take profit percentage based on market condition
-        if self.current_market_condition == 'BULLISH':
-            tp1_pct = TAKE_PROFIT_PCT_BULLISH * 0.5  # 50% of target
-            tp2_pct = TAKE_PROFIT_PCT_BULLISH        # 100% of target
-            tp3_pct = TAKE_PROFIT_PCT_BULLISH * 1.5  # 150% of target
-        elif self.current_market_condition == 'BEARISH':
-            tp1_pct = TAKE_PROFIT_PCT_BEARISH * 0.5  # Earlier take profit in bearish market
-            tp2_pct = TAKE_PROFIT_PCT_BEARISH
-            tp3_pct = TAKE_PROFIT_PCT_BEARISH * 1.3  # Only 130% of target in bearish markets
-        elif self.current_market_condition == 'SIDEWAYS':
-            tp1_pct = TAKE_PROFIT_PCT_SIDEWAYS * 0.7  # Take profits quicker in sideways markets
-            tp2_pct = TAKE_PROFIT_PCT_SIDEWAYS
-            tp3_pct = TAKE_PROFIT_PCT_SIDEWAYS * 1.2  # Conservative extension in sideways
-        else:
-            tp1_pct = TAKE_PROFIT_PCT * 0.5
-            tp2_pct = TAKE_PROFIT_PCT
-            tp3_pct = TAKE_PROFIT_PCT * 1.5
+        # Choose take profit percentages based on market condition
+        pcts = self._active_params['tp'] * self._active_params['tp_multipliers']
         
         # Get symbol info for price precision
-        symbol_info = self.binance_client.get_symbol_info(symbol)
+        symbol_info = self._get_symbol_info(symbol)
         price_precision = 2  # Default
         if symbol_info:
-            price_precision = symbol_info.get('price_precision', 2)
+            price_precision = symbol_info.price_precision
         
-        # Calculate take profit prices
-        if side == "BUY":  # Long position
-            tp1_price = round(entry_price * (1 + tp1_pct), price_precision)
-            tp2_price = round(entry_price * (1 + tp2_pct), price_precision)
-            tp3_price = round(entry_price * (1 + tp3_pct), price_precision)
-        else:  # Short position
-            tp1_price = round(entry_price * (1 - tp1_pct), price_precision)
-            tp2_price = round(entry_price * (1 - tp2_pct), price_precision)
-            tp3_price = round(entry_price * (1 - tp3_pct), price_precision)
+        # Calculate take profit prices (above entry for longs, below entry for shorts)
+        sign = 1 if side == "BUY" else -1
+        prices = np.round(entry_price * (1 + sign * pcts), price_precision).tolist()
+        pcts_from_entry = (pcts * 100).tolist()
         
         # Define partial take profit levels with % of position to close at each level
+        # (30% at the first TP, 40% at the second, 30% at the third)
         take_profits = [
-            {'price': tp1_price, 'percentage': 0.3, 'pct_from_entry': tp1_pct * 100},  # Close 30% at first TP
-            {'price': tp2_price, 'percentage': 0.4, 'pct_from_entry': tp2_pct * 100},  # Close 40% at second TP
-            {'price': tp3_price, 'percentage': 0.3, 'pct_from_entry': tp3_pct * 100}   # Close 30% at third TP
+            {'price': price, 'percentage': percentage, 'pct_from_entry': pct_from_entry}
+            for price, percentage, pct_from_entry in zip(prices, PARTIAL_TP_CLOSE_FRACTIONS, pcts_from_entry)
         ]
         
         logger.info(f"Calculated {self.current_market_condition} partial take profits: "
-                   f"TP1: {tp1_price} ({tp1_pct*100:.2f}%), "
-                   f"TP2: {tp2_price} ({tp2_pct*100:.2f}%), "
-                   f"TP3: {tp3_price} ({tp3_pct*100:.2f}%)")
+                   f"TP1: {prices[0]} ({pcts_from_entry[0]:.2f}%), "
+                   f"TP2: {prices[1]} ({pcts_from_entry[1]:.2f}%), "
+                   f"TP3: {prices[2]} ({pcts_from_entry[2]:.2f}%)")
                    
         return take_profits
         
+    def _klines_volatility(self, symbol, klines):
+        """
+        Weighted ATR and swing highs/lows for a klines list, cached per symbol
+        
+        The cache is keyed on the candle count, the first and last open times and the last
+        candle's high/low/close, since the live candle is updated in place. Repeated calls with
+        an unchanged buffer skip the NumPy conversion and the ATR/pivot pass.
+        
+        Returns:
+            tuple: (weighted ATR, swing high prices, swing low prices)
+        """
+        from modules._risk_numba import _swing_pivots, _weighted_atr
+        
+        last = klines[-1]
+        key = (len(klines), klines[0][0], last[0], last[2], last[3], last[4])
+        cached = self._klines_cache.get(symbol)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+            
+        # Extract high/low/close columns from the klines (Binance kline format:
+        # open_time, open, high, low, close, ...) as float arrays for ATR calculation
+        arr = np.asarray(klines, dtype=object)
+        high = arr[:, 2].astype(np.float64)
+        low = arr[:, 3].astype(np.float64)
+        close = arr[:, 4].astype(np.float64)
+        
+        swing_highs, swing_lows = _swing_pivots(high, low)
+        result = (_weighted_atr(high, low, close), swing_highs, swing_lows)
+        self._klines_cache[symbol] = (key, result)
+        return result
+        
     def calculate_volatility_based_stop_loss(self, symbol, side, entry_price, klines=None):
         """
         Enhanced volatility-based stop loss with dynamic multipliers and key level detection
@@ -526,191 +774,82 @@ class RiskManager:
         if not USE_STOP_LOSS:
             return None
             
+        # Coerce once so everything below runs on plain floats (prices may arrive as str or Decimal)
+        try:
+            entry_price = float(entry_price)
+        except (TypeError, ValueError):
+            # Neither the ATR nor the percentage stop can be computed from this value
+            logger.error(f"Invalid entry price for volatility-based stop loss: {entry_price!r}")
+            return None
+            
         # If no klines provided, use default percentage-based stop loss
         if klines is None or len(klines) < 20:
             return self.calculate_stop_loss(symbol, side, entry_price)
         
         # Special handling for RAYSOL tokens which have higher volatility
-        is_raysol = 'RAYSOL' in symbol
+        is_raysol = _is_raysol(symbol)
             
         try:
-            # Convert klines to dataframe for ATR calculation
-            df = pd.DataFrame(klines, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
-            
-            # Convert string values to numeric
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = pd.to_numeric(df[col])
-                
-            # Find support/resistance levels (recent swing points)
-            highs = []
-            lows = []
-            
-            # Use a minimum of 30 candles for support/resistance detection if available
-            lookback = min(len(df), 50)
-            price_data = df[-lookback:].copy()
-            
-            # Find swing high/low points (simplified pivot detection)
-            for i in range(2, len(price_data) - 2):
-                # Swing high
-                if (price_data['high'].iloc[i] > price_data['high'].iloc[i-1] and
-                    price_data['high'].iloc[i] > price_data['high'].iloc[i-2] and
-                    price_data['high'].iloc[i] > price_data['high'].iloc[i+1] and
-                    price_data['high'].iloc[i] > price_data['high'].iloc[i+2]):
-                    highs.append(price_data['high'].iloc[i])
-                
-                # Swing low
-                if (price_data['low'].iloc[i] < price_data['low'].iloc[i-1] and
-                    price_data['low'].iloc[i] < price_data['low'].iloc[i-2] and
-                    price_data['low'].iloc[i] < price_data['low'].iloc[i+1] and
-                    price_data['low'].iloc[i] < price_data['low'].iloc[i+2]):
-                    lows.append(price_data['low'].iloc[i])
-            
-            # Calculate various ATR periods for better volatility assessment
-            atr_short = ta.volatility.average_true_range(
-                df['high'], df['low'], df['close'], window=7
-            ).iloc[-1]
+            # Imported here so that numba (~200ms, tens of MB) is only loaded when this stop loss is used
+            from modules._risk_numba import _compute_stop_price, _nearest_levels
             
-            atr_medium = ta.volatility.average_true_range(
-                df['high'], df['low'], df['close'], window=14
-            ).iloc[-1]
+            # Weighted multi-window ATR and recent swing points, reused while the candles are unchanged
+            atr, swing_highs, swing_lows = self._klines_volatility(symbol, klines)
             
-            atr_long = ta.volatility.average_true_range(
-                df['high'], df['low'], df['close'], window=21
-            ).iloc[-1]
-            
-            # Use weighted average ATR with more weight to recent volatility
-            atr = (atr_short * 0.5 + atr_medium * 0.3 + atr_long * 0.2)
+            # Nearest swing support (longs) or resistance (shorts) around the entry (0.0 = no level found)
+            nearest_support, nearest_resistance = _nearest_levels(
+                swing_highs, swing_lows, entry_price, side == "BUY"
+            )
             
             # Calculate ATR as percentage of price
             atr_pct = atr / entry_price
             
-            # Calculate price distance from entry to nearest support/resistance
-            nearest_support = None
-            nearest_resistance = None
-            
-            # For long positions, find nearest support below entry price
-            if side == "BUY":
-                valid_supports = [l for l in lows if l < entry_price]
-                if valid_supports:
-                    nearest_support = max(valid_supports)  # Closest support below entry
-            # For short positions, find nearest resistance above entry price
-            else:
-                valid_resistances = [h for h in highs if h > entry_price]
-                if valid_resistances:
-                    nearest_resistance = min(valid_resistances)  # Closest resistance above entry
+            # Read the market condition once for the lookups and logs below
+            market_condition = self.current_market_condition
+            condition_id = self.current_market_condition_id
             
             # Base multiplier on market condition with better risk management
-            if self.current_market_condition == 'EXTREME_BULLISH':
-                atr_multiplier = 2.5  # Wider stops in extreme bullish trend
-            elif self.current_market_condition == 'BULLISH':
-                atr_multiplier = 2.0  # Wide stops in bullish trend
-            elif self.current_market_condition == 'EXTREME_BEARISH':
-                atr_multiplier = 1.3  # Tighter stops in extreme bearish trend
-            elif self.current_market_condition == 'BEARISH':
-                atr_multiplier = 1.5  # Medium stops in bearish trend
-            else:  # SIDEWAYS
-                atr_multiplier = 1.0  # Tighter stops in sideways market
+            atr_multiplier = ATR_MULTIPLIERS[condition_id]
             
             # Apply RAYSOL-specific adjustments
             if is_raysol:
                 original_multiplier = atr_multiplier
                 atr_multiplier = atr_multiplier * 1.35  # Reduced from 1.5 to 1.35 for better win rate
-                logger.info(f"RAYSOL token detected: Increasing ATR multiplier from {original_multiplier} to {atr_multiplier}")
+                logger.info("RAYSOL token detected: Increasing ATR multiplier from %s to %s", original_multiplier, atr_multiplier)
             
-            # Calculate stop loss price - use support/resistance levels if available
-            if side == "BUY":  # Long
-                # Base stop on ATR initially
-                atr_stop_distance = atr * atr_multiplier
-                atr_stop_price = entry_price - atr_stop_distance
-                
-                # For long positions, consider nearest support level
-                if nearest_support:
-                    support_distance = entry_price - nearest_support
-                    # Only use support level if it's not too far (max 1.5x ATR distance)
-                    if support_distance <= atr_stop_distance * 1.5:
-                        # Place stop slightly below support (5% of ATR)
-                        support_stop_price = nearest_support - (atr * 0.05)
-                        # Use the better (higher) of the two stop prices
-                        stop_price = max(atr_stop_price, support_stop_price)
-                        logger.info(f"Using support-based stop loss: {stop_price} (support level: {nearest_support})")
-                    else:
-                        stop_price = atr_stop_price
-                else:
-                    stop_price = atr_stop_price
-                    
-                # Cap maximum stop distance to standard percentage stop loss * multiplier
-                max_stop_pct = STOP_LOSS_PCT
-                if self.current_market_condition == 'EXTREME_BEARISH':
-                    max_stop_pct = STOP_LOSS_PCT * 0.8  # Tighter in extreme bear markets
-                elif self.current_market_condition == 'BEARISH':
-                    max_stop_pct = STOP_LOSS_PCT * 0.9  # Slightly tighter in bear markets
+            # Cap maximum stop distance to standard percentage stop loss * multiplier,
+            # tighter when trading against the trend
+            max_stop_pct = _MAX_STOP_PCTS[side == "BUY"][condition_id]
                 
-                # For RAYSOL, adapt the maximum stop distance
-                if is_raysol:
-                    max_stop_pct = max_stop_pct * 1.25  # Reduced from 1.5 to 1.25 for better win rate
-                    
-                max_stop_distance = entry_price * max_stop_pct
-                min_stop_price = entry_price - max_stop_distance
-                
-                # Ensure stop price doesn't exceed max distance
-                stop_price = max(stop_price, min_stop_price)
-                
-            else:  # Short
-                # Base stop on ATR initially
-                atr_stop_distance = atr * atr_multiplier
-                atr_stop_price = entry_price + atr_stop_distance
+            # For RAYSOL, adapt the maximum stop distance
+            if is_raysol:
+                max_stop_pct = max_stop_pct * 1.25  # Reduced from 1.5 to 1.25 for better win rate
                 
-                # For short positions, consider nearest resistance level
-                if nearest_resistance:
-                    resistance_distance = nearest_resistance - entry_price
-                    # Only use resistance level if it's not too far (max 1.5x ATR distance)
-                    if resistance_distance <= atr_stop_distance * 1.5:
-                        # Place stop slightly above resistance (5% of ATR)
-                        resistance_stop_price = nearest_resistance + (atr * 0.05)
-                        # Use the better (lower) of the two stop prices
-                        stop_price = min(atr_stop_price, resistance_stop_price)
-                        logger.info(f"Using resistance-based stop loss: {stop_price} (resistance level: {nearest_resistance})")
-                    else:
-                        stop_price = atr_stop_price
+            # Calculate stop loss price - use support/resistance levels if available
+            stop_price, level_stop_price, used_level = _compute_stop_price(
+                1.0 if side == "BUY" else -1.0, entry_price, atr, atr_multiplier,
+                nearest_support if side == "BUY" else nearest_resistance, max_stop_pct
+            )
+            if used_level:
+                if side == "BUY":
+                    logger.info("Using support-based stop loss: %s (support level: %s)", level_stop_price, nearest_support)
                 else:
-                    stop_price = atr_stop_price
-                
-                # Cap maximum stop distance to standard percentage stop loss * multiplier
-                max_stop_pct = STOP_LOSS_PCT
-                if self.current_market_condition == 'EXTREME_BULLISH':
-                    max_stop_pct = STOP_LOSS_PCT * 0.8  # Tighter in extreme bull markets
-                elif self.current_market_condition == 'BULLISH':
-                    max_stop_pct = STOP_LOSS_PCT * 0.9  # Slightly tighter in bull markets
-                
-                # For RAYSOL, adapt the maximum stop distance
-                if is_raysol:
-                    max_stop_pct = max_stop_pct * 1.25  # Reduced from 1.5 to 1.25 for better win rate
-                    
-                max_stop_distance = entry_price * max_stop_pct
-                max_stop_price = entry_price + max_stop_distance
-                
-                # Ensure stop price doesn't exceed max distance
-                stop_price = min(stop_price, max_stop_price)
+                    logger.info("Using resistance-based stop loss: %s (resistance level: %s)", level_stop_price, nearest_resistance)
             
             # Apply price precision
-            symbol_info = self.binance_client.get_symbol_info(symbol)
-            if symbol_info:
-                price_precision = symbol_info['price_precision']
+            price_precision = self._get_price_precision(symbol)
+            if price_precision is not None:
                 stop_price = round(stop_price, price_precision)
                 
             # Add detailed log information for better understanding
             if is_raysol:
-                logger.info(f"Calculated optimized RAYSOL-specific stop loss at {stop_price} "
-                          f"(ATR: {atr:.6f}, {atr_pct*100:.2f}% of price, "
-                          f"Multiplier: {atr_multiplier}, Market condition: {self.current_market_condition})")
+                logger.info("Calculated optimized RAYSOL-specific stop loss at %s "
+                            "(ATR: %.6f, %.2f%% of price, Multiplier: %s, Market condition: %s)",
+                            stop_price, atr, atr_pct * 100, atr_multiplier, market_condition)
             else:
-                logger.info(f"Calculated optimized ATR-based stop loss at {stop_price} "
-                          f"(ATR: {atr:.6f}, {atr_pct*100:.2f}% of price, "
-                          f"Multiplier: {atr_multiplier}, Market condition: {self.current_market_condition})")
+                logger.info("Calculated optimized ATR-based stop loss at %s "
+                            "(ATR: %.6f, %.2f%% of price, Multiplier: %s, Market condition: %s)",
+                            stop_price, atr, atr_pct * 100, atr_multiplier, market_condition)
             return stop_price
                 
         except Exception as e:
@@ -718,12 +857,102 @@ class RiskManager:
             
         # Fall back to standard stop loss if ATR calculation fails
         return self.calculate_stop_loss(symbol, side, entry_price)
+        
+    def calculate_volatility_based_stop_loss_batch(self, symbols, sides, entry_prices, klines):
+        """
+        Vectorized calculate_volatility_based_stop_loss for several positions at once
+        
+        Args:
+            symbols: Sequence of trading pair symbols
+            sides: Sequence of 'BUY' or 'SELL', one per symbol
+            entry_prices: Sequence of entry prices, one per symbol
+            klines: Sequence with the recent price data for each position (None for the percentage stop)
+            
+        Returns:
+            ndarray: Stop loss prices rounded to each symbol's price precision, or None if stop losses are disabled
+        """
+        if not USE_STOP_LOSS:
+            return None
+            
+        from modules._risk_numba import _nearest_levels, _stop_prices
+        
+        symbols = np.asarray(symbols)
+        directions = np.where(np.asarray(sides) == 'BUY', 1.0, -1.0)
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        
+        # ATR and nearest support/resistance per position (reusing the per-symbol klines cache)
+        # ATRs only scale the stop distance, so float32 is plenty and halves the array size;
+        # levels and entry prices stay float64 since a float32 price can be off by a tick
+        n = len(entry_prices)
+        atrs = np.zeros(n, dtype=np.float32)
+        nearest_levels = np.zeros(n)
+        has_atr = np.zeros(n, dtype=bool)
+        for i in range(n):
+            position_klines = klines[i]
+            if position_klines is None or len(position_klines) < 20:
+                continue
+            try:
+                atr, swing_highs, swing_lows = self._klines_volatility(symbols[i], position_klines)
+            except Exception as e:
+                logger.error(f"Error calculating volatility-based stop loss for {symbols[i]}: {e}")
+                continue
+            side_is_buy = directions[i] > 0
+            nearest_support, nearest_resistance = _nearest_levels(swing_highs, swing_lows, entry_prices[i], side_is_buy)
+            atrs[i] = atr
+            nearest_levels[i] = nearest_support if side_is_buy else nearest_resistance
+            has_atr[i] = True
+            
+        # Per-position multiplier and maximum stop distance for the current market condition
+        condition_id = self.current_market_condition_id
+        raysol = np.char.find(symbols.astype(str), 'RAYSOL') >= 0
+        atr_multipliers = np.where(raysol, ATR_MULTIPLIERS[condition_id] * 1.35, ATR_MULTIPLIERS[condition_id])
+        max_stop_pcts = np.where(directions > 0, _MAX_STOP_PCTS[True][condition_id], _MAX_STOP_PCTS[False][condition_id])
+        max_stop_pcts = np.where(raysol, max_stop_pcts * 1.25, max_stop_pcts)
+        
+        stop_prices = _stop_prices(directions, entry_prices, atrs, atr_multipliers, nearest_levels, max_stop_pcts)
+        
+        # Positions without usable klines get the percentage based stop loss
+        if not has_atr.all():
+            stop_loss_pct = np.where(raysol, self._active_params['sl_raysol'], self._active_params['sl'])
+            percentage_stops = entry_prices * (1 - directions * stop_loss_pct)
+            stop_prices = np.where(has_atr, stop_prices, percentage_stops)
+            
+        stop_prices = self._round_prices_batch(symbols, stop_prices)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calculated %s volatility-based stop losses for %d positions", self.current_market_condition, n)
+        return stop_prices
+
+
+def _find_existing_tp(open_orders, expected_side):
+    """Stop price of the first TAKE_PROFIT_MARKET order on the given side, or None"""
+    return next(
+        (float(order['stopPrice']) for order in open_orders
+         if order['type'] == 'TAKE_PROFIT_MARKET' and order['side'] == expected_side),
+        None
+    )
+
+
+@lru_cache(maxsize=512)
+def _precision_scale(step_size):
+    """Decimal precision of a step size and the matching power of ten, e.g. 0.001 -> (3, 1000)"""
+    precision = int(round(-math.log10(step_size)))
+    return precision, 10**precision
 
 
 def round_step_size(quantity, step_size):
     """Round quantity based on step size"""
-    precision = int(round(-math.log10(step_size)))
-    return round(math.floor(quantity * 10**precision) / 10**precision, precision)
+    _, scale = _precision_scale(step_size)
+    # floor(q * scale) / scale is already the closest float to a multiple of the step,
+    # so no extra round() is needed
+    return math.floor(quantity * scale) / scale
+
+
+try:
+    # Native round_step_size from build_risk_kernels.py (no Python float boxing per call).
+    # Imported from the compiled extension directly so numba itself isn't loaded here.
+    from modules._risk_kernels import round_step_size
+except ImportError:
+    pass
 
 
 def get_step_size(min_qty):
@@ -55,6 +55,10 @@ source "${VENV_DIR}/bin/activate"
 pip install --upgrade pip
 pip install -r "${BOT_DIR}/requirements.txt"
 
+# Precompile the risk management kernels (the bot falls back to JIT compilation if this fails)
+print_message "⚙️  Precompiling risk management kernels..."
+python3 "${BOT_DIR}/build_risk_kernels.py" || print_message "⚠️  Could not precompile risk kernels, they will be compiled on first use." "$YELLOW"
+
 # Create necessary directories
 print_message "📁 Creating necessary directories..."
 mkdir -p "${BOT_DIR}/logs"